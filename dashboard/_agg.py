@@ -0,0 +1,113 @@
+"""
+Cached aggregations shared by the dashboard pages
+Reruns triggered by unrelated widgets are served from cache instead of re-aggregating
+"""
+import hashlib
+
+import pandas as pd
+import streamlit as st
+
+# Columns the aggregations below read; only these feed the cache key
+_KEY_COLUMNS = ['package', 'version', 'location', 'match_package']
+
+
+def frame_key(df: pd.DataFrame) -> tuple:
+    """Cheap cache key: shape, column names and a hash of the aggregated columns
+
+    The row hashes are digested in order, so a reordered frame gets its own key;
+    results like the first rows per group depend on row order.
+    """
+    cols = [col for col in _KEY_COLUMNS if col in df.columns]
+    digest = ''
+    if cols:
+        row_hashes = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+        digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+    return (len(df), tuple(df.columns), digest)
+
+
+_cached = st.cache_data(
+    ttl="10m", max_entries=16, hash_funcs={pd.DataFrame: frame_key}, show_spinner=False
+)
+
+
+def observed_counts(series: pd.Series, sort: bool = True) -> pd.Series:
+    """value_counts without the zero rows categoricals report for unused categories"""
+    counts = series.value_counts(sort=sort)
+    return counts[counts > 0]
+
+
+def _lower_labels(counts: pd.Series) -> pd.Index:
+    """Lowercased labels of a categorical value_counts result
+
+    Casting to the categories' dtype first keeps Arrow-backed names on Arrow's
+    string kernels; `CategoricalIndex.str` would go through Python objects.
+    """
+    return counts.index.astype(counts.index.categories.dtype).str.lower()
+
+
+@_cached
+def top_packages(df: pd.DataFrame, n: int = 20) -> pd.Series:
+    """Occurrence counts of the `n` most frequently found packages"""
+    # Partial selection instead of fully sorting every package's count
+    return observed_counts(df['package'], sort=False).nlargest(n)
+
+
+@_cached
+def sorted_packages(df: pd.DataFrame) -> list:
+    """Distinct package names, sorted from the categories rather than every row"""
+    return df['package'].cat.categories.sort_values().tolist()
+
+
+@_cached
+def infected_counts(infected_df: pd.DataFrame) -> pd.Series:
+    """Occurrence counts per matched infected package"""
+    return observed_counts(infected_df['match_package'])
+
+
+@_cached
+def location_counts(infected_df: pd.DataFrame, n: int = 10) -> pd.Series:
+    """Infected package counts for the `n` most affected locations"""
+    return observed_counts(infected_df['location'], sort=False).nlargest(n)
+
+
+@_cached
+def version_diversity(df: pd.DataFrame) -> pd.Series:
+    """Number of distinct versions per package, most diverse first"""
+    # Group sizes over the distinct (package, version) pairs instead of nunique,
+    # which builds a set per group
+    pairs = df[['package', 'version']].dropna().drop_duplicates()
+    return pairs.groupby('package', observed=True).size().sort_values(ascending=False)
+
+
+@_cached
+def detect_frameworks(df: pd.DataFrame, frameworks: dict) -> dict:
+    """Occurrence counts for each framework whose package names appear in `df`"""
+    # Count once per package, then lowercase the K distinct names rather than N rows
+    counts = observed_counts(df['package'])
+    counts = counts.groupby(_lower_labels(counts)).sum()
+
+    detected = {}
+    for framework, packages in frameworks.items():
+        for pkg in packages:
+            if pkg in counts.index:
+                detected[framework] = int(counts[pkg])
+    return detected
+
+
+@_cached
+def detect_crates(df: pd.DataFrame, crate_groups: dict, tracked: frozenset) -> dict:
+    """Per-category occurrence counts of the tracked crates found in `df`
+
+    `tracked` is every crate name listed in `crate_groups`.
+    """
+    # One counting pass over the rows, then look up every tracked name in the result
+    counts = observed_counts(df['package'])
+    counts = counts.groupby(_lower_labels(counts)).sum()
+    counts = counts[counts.index.isin(tracked)]
+
+    detected = {}
+    for category, crates in crate_groups.items():
+        hits = {crate: int(counts[crate]) for crate in crates if crate in counts.index}
+        if hits:
+            detected[category] = hits
+    return detected
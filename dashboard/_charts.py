@@ -0,0 +1,67 @@
+"""
+Plotly chart builders shared by the dashboard pages
+Builds graph_objects traces directly, skipping plotly.express' DataFrame wrangling
+Figure specs are cached, so reruns with unchanged counts skip figure construction
+"""
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+
+@st.cache_data(ttl="10m", max_entries=64, show_spinner=False)
+def _bar_chart_spec(
+    counts: pd.Series,
+    title: str,
+    x_title: str,
+    y_title: str,
+    colorscale: str,
+    color: str,
+    height: int,
+) -> dict:
+    if colorscale:
+        marker = dict(color=counts.values, colorscale=colorscale, showscale=True)
+    else:
+        marker = dict(color=color) if color else None
+    fig = go.Figure(go.Bar(
+        x=counts.values,
+        y=counts.index.tolist(),
+        orientation='h',
+        marker=marker,
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        height=height,
+        showlegend=False,
+    )
+    return fig.to_dict()
+
+
+def bar_chart(
+    counts: pd.Series,
+    title: str,
+    x_title: str,
+    y_title: str,
+    colorscale: str = None,
+    height: int = None,
+    color: str = None,
+) -> go.Figure:
+    """Horizontal bar chart of `counts`, optionally shaded by value
+
+    A flat `color` fills every bar without the per-bar colors and colorbar a
+    `colorscale` adds to the figure.
+    """
+    return go.Figure(_bar_chart_spec(counts, title, x_title, y_title, colorscale, color, height))
+
+
+@st.cache_data(ttl="10m", max_entries=64, show_spinner=False)
+def _pie_chart_spec(counts: pd.Series, title: str) -> dict:
+    fig = go.Figure(go.Pie(values=counts.values, labels=counts.index.tolist()))
+    fig.update_layout(title=title)
+    return fig.to_dict()
+
+
+def pie_chart(counts: pd.Series, title: str) -> go.Figure:
+    """Pie chart of `counts`, one slice per index value"""
+    return go.Figure(_pie_chart_spec(counts, title))
@@ -0,0 +1,273 @@
+"""
+Shared data loading for the dashboard pages
+Parses scanner CSV output once and serves it from the Streamlit cache
+"""
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
+# Source columns the aggregation frame keeps; raw views and exports read the full source
+USED_COLUMNS = frozenset({
+    'package', 'package_name', 'version', 'has_version',
+    'location', 'should_path', 'application_root',
+    'match_package', 'parent_package', 'match_version', 'should_version',
+    'ecosystem',
+})
+
+# Source column names mapped onto the names the dashboard reads
+RENAMED_COLUMNS = {
+    'package_name': 'package',
+    'has_version': 'version',
+    'parent_package': 'match_package',
+    'should_version': 'match_version',
+}
+
+# Low-cardinality string columns stored as categoricals
+CATEGORY_COLUMNS = ('package', 'match_package', 'ecosystem', 'version', 'location')
+
+# Source columns the C parser builds as categoricals directly; the rest are read
+# as text like the PyArrow path, and match columns need 'none' filled
+PARSE_CATEGORY_COLUMNS = frozenset({
+    'package', 'package_name', 'location', 'should_path', 'application_root', 'ecosystem',
+})
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize column names to support different CSV formats"""
+    df.columns = df.columns.str.strip()
+
+    # Rename in place rather than copying each source column; when a CSV carries
+    # both names the source column wins
+    renames = {src: dst for src, dst in RENAMED_COLUMNS.items() if src in df.columns}
+    if 'location' not in df.columns:
+        for src in ('should_path', 'application_root'):
+            if src in df.columns:
+                renames[src] = 'location'
+                break
+    for dst in renames.values():
+        if dst in df.columns:
+            del df[dst]
+    df.rename(columns=renames, inplace=True)
+
+    # Handle match columns
+    for col in ('match_package', 'match_version'):
+        if col in df.columns:
+            df[col] = df[col].fillna('none')
+        else:
+            df[col] = 'none'
+
+    # Categoricals let value_counts/groupby work on integer codes
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    # Precompute the infection mask once, lowercasing the categories rather than
+    # every row (with Arrow's string kernel when Arrow-backed); missing values
+    # (code -1) pick up the trailing False
+    match = df['match_package'].cat
+    infected = np.asarray(match.categories.str.lower() != 'none', dtype=bool)
+    df['_infected'] = np.append(infected, False)[match.codes.to_numpy()]
+
+    return df
+
+
+def _read_source(source):
+    """Read every column of a CSV as text, as the scanner wrote it
+
+    Uses the multithreaded PyArrow parser and returns a `pa.Table`; empty cells
+    come back as nulls, and versions like `1.10` are not parsed as floats. Falls
+    back to a DataFrame from the C engine when pyarrow is not installed, parsing
+    the low-cardinality columns straight into categoricals.
+    """
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    if pa is None:
+        dtype = {col: 'category' if col.strip() in PARSE_CATEGORY_COLUMNS else str for col in header}
+        return pd.read_csv(source, dtype=dtype)
+    convert_options = pacsv.ConvertOptions(
+        column_types={col: pa.string() for col in header},
+        strings_can_be_null=True,
+    )
+    return pacsv.read_csv(source, convert_options=convert_options)
+
+
+def _prepare(source) -> pd.DataFrame:
+    """Normalized frame of the columns the dashboard aggregates over"""
+    names = source.column_names if pa is not None else source.columns
+    usecols = [col for col in names if col.strip() in USED_COLUMNS] or list(names)
+    if pa is None:
+        return _normalize(source[usecols].copy())
+    return _normalize(source.select(usecols).to_pandas(types_mapper=pd.ArrowDtype))
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _load_source(csv_path: str, mtime: float):
+    """Every column of the CSV, shared read-only by every session
+
+    Raw views and the export read it directly. It has no ttl, since `mtime` in
+    the key already retires stale files, so it outlives `load_data`'s entry; an
+    expired frame is rebuilt from it without parsing the file again.
+    """
+    return _read_source(csv_path)
+
+
+@st.cache_data(ttl="10m", max_entries=8, show_spinner="Loading CSV...")
+def load_data(csv_path: str, mtime: float) -> pd.DataFrame:
+    """Load and prepare the CSV data
+
+    `mtime` is only part of the cache key, so rewriting the file invalidates it.
+    """
+    return _prepare(_load_source(csv_path, mtime))
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _upload_source(upload_key: str, _raw_bytes: bytes):
+    """Every column of an uploaded CSV, shared read-only like `_load_source`"""
+    return _read_source(io.BytesIO(_raw_bytes))
+
+
+@st.cache_data(ttl="10m", max_entries=8, show_spinner="Loading CSV...")
+def parse_uploaded(upload_key: str, _raw_bytes: bytes) -> pd.DataFrame:
+    """Load and prepare an uploaded CSV
+
+    `_raw_bytes` is skipped by Streamlit's hasher; `upload_key` is its digest.
+    """
+    return _prepare(_upload_source(upload_key, _raw_bytes))
+
+
+@st.cache_data(ttl="10m", max_entries=8, show_spinner=False)
+def to_csv_bytes(source_key, _source) -> bytes:
+    """Serialize a loaded source for download, with every column the scanner wrote
+
+    `_source` is skipped by Streamlit's hasher; callers pass its identity as
+    `source_key`: `(csv_path, mtime)` or the upload digest.
+    """
+    if pa is None:
+        return _source.to_csv(index=False).encode('utf-8')
+    # Arrow's multithreaded writer is much faster than to_csv on wide frames
+    sink = io.BytesIO()
+    pacsv.write_csv(_source, sink)
+    return sink.getvalue()
+
+
+def load_csv(csv_path: str) -> pd.DataFrame:
+    """Load the CSV at `csv_path`, stopping the page on errors
+
+    The loaded frame is kept in session state so navigating between pages reuses
+    the same object instead of copying it out of the cache. Pages must treat it
+    as read-only.
+    """
+    try:
+        mtime = Path(csv_path).stat().st_mtime
+        df_key = (csv_path, mtime)
+        if st.session_state.get('df_key') == df_key:
+            return st.session_state['df']
+        df = load_data(csv_path, mtime)
+        source = _load_source(csv_path, mtime)
+    except FileNotFoundError:
+        st.error(f"CSV file not found: {csv_path}")
+        st.stop()
+    except Exception as e:
+        st.error(f"Error loading CSV: {e}")
+        st.stop()
+
+    st.session_state['df'] = df
+    st.session_state['df_key'] = df_key
+    st.session_state['df_source'] = source
+    return df
+
+
+def load_upload(raw_bytes: bytes) -> pd.DataFrame:
+    """Load an uploaded CSV, keeping its source for raw views and export"""
+    upload_key = hashlib.sha256(raw_bytes).hexdigest()
+    df = parse_uploaded(upload_key, raw_bytes)
+    st.session_state['uploaded_key'] = upload_key
+    st.session_state['uploaded_source'] = _upload_source(upload_key, raw_bytes)
+    return df
+
+
+def active_source() -> tuple:
+    """`(source_key, source)` of the scan on screen: the upload if any, else the CSV"""
+    if st.session_state.get('uploaded_df') is not None:
+        return st.session_state['uploaded_key'], st.session_state['uploaded_source']
+    return st.session_state['df_key'], st.session_state['df_source']
+
+
+def raw_rows(df: pd.DataFrame, limit: int = None) -> pd.DataFrame:
+    """Rows of `df` with every column the scanner wrote, for raw data views
+
+    Loaded frames keep the source row positions as their index, so only the
+    requested rows are pulled out of the source.
+    """
+    _, source = active_source()
+    index = df.index if limit is None else df.index[:limit]
+    if pa is None:
+        return source.iloc[index].set_axis(index)
+    rows = source.take(pa.array(index.to_numpy()))
+    return rows.to_pandas(types_mapper=pd.ArrowDtype).set_axis(index)
+
+
+def split_by_ecosystem(df: pd.DataFrame) -> dict:
+    """Per-ecosystem subframes of `df`, keyed by lowercased ecosystem name
+
+    The split runs once per loaded frame and is kept in session state, so each
+    page looks up its subframe instead of rescanning the ecosystem column.
+    """
+    cached = st.session_state.get('by_ecosystem')
+    if cached is not None and cached[0] is df:
+        return cached[1]
+
+    by_ecosystem = {}
+    if 'ecosystem' in df.columns:
+        # Group on integer codes of the lowercased categories, so rows stay
+        # categorical and no per-row strings are built; missing values (-1) are dropped
+        ecosystem = df['ecosystem'].cat
+        codes, names = pd.factorize(ecosystem.categories.str.lower())
+        row_codes = np.append(codes, -1)[ecosystem.codes.to_numpy()]
+        if len(names) == 1 and (row_codes >= 0).all():
+            # Single-ecosystem scans reuse the loaded frame instead of copying every row
+            by_ecosystem = {names[0]: df}
+        else:
+            by_ecosystem = {names[code]: group for code, group in df.groupby(row_codes) if code >= 0}
+    st.session_state['by_ecosystem'] = (df, by_ecosystem)
+    return by_ecosystem
+
+
+@st.cache_data(ttl="30s", show_spinner=False)
+def find_csvs(root: str, limit: int = 50) -> list[str]:
+    """Find CSV files below `root`, sorted by file name
+
+    Hidden directories are pruned during the walk rather than filtered afterwards,
+    so trees like `.git` are never descended into.
+    """
+    found = []
+    pending = [root]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.endswith('.csv') and entry.is_file():
+                    found.append(entry.path)
+
+    found.sort(key=lambda path: (os.path.basename(path), path))
+    return found[:limit]
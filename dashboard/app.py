@@ -4,11 +4,13 @@ Visualizes npm package scan results from CSV output
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from pathlib import Path
 import sys
 
+import _agg as agg
+import _charts as charts
+from _data import active_source, find_csvs, load_csv, load_upload, raw_rows, to_csv_bytes
+
 # Page config
 st.set_page_config(
     page_title="Package Scanner Dashboard",
@@ -17,40 +19,60 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-def load_data(csv_path: str) -> pd.DataFrame:
-    """Load and prepare the CSV data"""
-    try:
-        df = pd.read_csv(csv_path)
-        df.columns = df.columns.str.strip()
-
-        # Normalize column names to support different formats
-        if 'package_name' in df.columns:
-            df['package'] = df['package_name']
-        if 'has_version' in df.columns:
-            df['version'] = df['has_version']
-        if 'should_path' in df.columns and 'location' not in df.columns:
-            df['location'] = df['should_path']
-        elif 'application_root' in df.columns and 'location' not in df.columns:
-            df['location'] = df['application_root']
-
-        # Handle match columns
-        if 'parent_package' in df.columns:
-            df['match_package'] = df['parent_package'].fillna('none')
-        elif 'match_package' not in df.columns:
-            df['match_package'] = 'none'
-
-        if 'should_version' in df.columns:
-            df['match_version'] = df['should_version'].fillna('none')
-        elif 'match_version' not in df.columns:
-            df['match_version'] = 'none'
-
-        return df
-    except FileNotFoundError:
-        st.error(f"CSV file not found: {csv_path}")
-        st.stop()
-    except Exception as e:
-        st.error(f"Error loading CSV: {e}")
-        st.stop()
+# Columns rendered in the infected packages details table
+DISPLAY_COLS = ['package', 'version', 'location', 'match_package', 'match_version']
+
+@st.fragment
+def infected_breakdown_fragment(infected_df: pd.DataFrame):
+    """Infected package type/location charts, rerun independently of the page"""
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Infected Packages by Type")
+        infected_counts = agg.infected_counts(infected_df)
+        fig = charts.pie_chart(infected_counts, "Distribution of Infected Package Types")
+        st.plotly_chart(fig, width='stretch')
+
+    with col2:
+        st.subheader("Infected Packages by Location")
+        location_counts = agg.location_counts(infected_df)
+        fig = charts.bar_chart(
+            location_counts,
+            "Top 10 Locations with Infected Packages",
+            x_title='Count',
+            y_title='Location',
+        )
+        st.plotly_chart(fig, width='stretch')
+
+@st.fragment
+def version_distribution_fragment(df: pd.DataFrame):
+    """Package selectbox with its version pie and locations table
+
+    Picking a package only reruns this fragment, not the whole page.
+    """
+    # Select a package to analyze
+    selected_package = st.selectbox(
+        "Select a package to analyze versions",
+        options=agg.sorted_packages(df)
+    )
+
+    if selected_package:
+        package_df = df[df['package'] == selected_package]
+        version_counts = agg.observed_counts(package_df['version'])
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            fig = charts.pie_chart(version_counts, f"Version Distribution for {selected_package}")
+            st.plotly_chart(fig, width='stretch')
+
+        with col2:
+            st.subheader("Locations")
+            st.dataframe(
+                package_df[['version', 'location']],
+                width='stretch',
+                height=300
+            )
 
 def main():
     st.title("📦 Package Scanner Dashboard - Overview")
@@ -75,9 +97,7 @@ def main():
 
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
-            df.columns = df.columns.str.strip()
-            st.session_state.uploaded_df = df
+            st.session_state.uploaded_df = load_upload(uploaded_file.getvalue())
             st.sidebar.success("✅ File uploaded successfully!")
         except Exception as e:
             st.sidebar.error(f"Error reading uploaded file: {e}")
@@ -88,14 +108,10 @@ def main():
     # Scan for CSV files in parent directory
     try:
         parent_dir = Path("..").resolve()
-        csv_files = list(parent_dir.glob("*.csv"))
-        csv_files.extend(parent_dir.glob("**/*.csv"))
-        # Filter out files in hidden directories and limit depth
-        csv_files = [f for f in csv_files if not any(part.startswith('.') for part in f.parts)]
-        csv_files = sorted(set(csv_files), key=lambda x: x.name)
+        csv_files = [Path(f) for f in find_csvs(str(parent_dir))]
 
         if csv_files:
-            csv_options = {str(f.relative_to(parent_dir)): str(f) for f in csv_files[:50]}  # Limit to 50 files
+            csv_options = {str(f.relative_to(parent_dir)): str(f) for f in csv_files}
 
             selected_csv = st.sidebar.selectbox(
                 "Select CSV File",
@@ -124,7 +140,7 @@ def main():
         df = st.session_state.uploaded_df
     else:
         st.session_state.csv_path = csv_path
-        df = load_data(csv_path)
+        df = load_csv(csv_path)
 
     # Display basic stats
     st.header("📊 Overview")
@@ -144,7 +160,7 @@ def main():
     with col4:
         # Count infected packages (where match_package is not "none")
         if 'match_package' in df.columns:
-            infected = df[df['match_package'].str.lower() != 'none'].shape[0]
+            infected = int(df['_infected'].sum())
         else:
             infected = 0
         st.metric("⚠️ Infected Packages", infected, delta_color="inverse")
@@ -152,100 +168,57 @@ def main():
     # Most used packages
     st.header("🔝 Most Used Packages")
     if 'package' in df.columns:
-        package_counts = df['package'].value_counts().head(20)
-        fig = px.bar(
-            x=package_counts.values,
-            y=package_counts.index,
-            orientation='h',
-            labels={'x': 'Count', 'y': 'Package'},
-            title="Top 20 Most Frequently Found Packages"
+        package_counts = agg.top_packages(df)
+        fig = charts.bar_chart(
+            package_counts,
+            "Top 20 Most Frequently Found Packages",
+            x_title='Count',
+            y_title='Package',
+            height=600,
         )
-        fig.update_layout(height=600, showlegend=False)
         st.plotly_chart(fig, width='stretch')
 
     # Infected packages section
     st.header("⚠️ Infected Packages Analysis")
 
     if 'match_package' in df.columns:
-        infected_df = df[df['match_package'].str.lower() != 'none'].copy()
+        infected_df = df[df['_infected']]
 
         if len(infected_df) > 0:
             st.warning(f"Found {len(infected_df)} infected package instances")
 
             # Show infected packages breakdown
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.subheader("Infected Packages by Type")
-                infected_counts = infected_df['match_package'].value_counts()
-                fig = px.pie(
-                    values=infected_counts.values,
-                    names=infected_counts.index,
-                    title="Distribution of Infected Package Types"
-                )
-                st.plotly_chart(fig, width='stretch')
-
-            with col2:
-                st.subheader("Infected Packages by Location")
-                location_counts = infected_df['location'].value_counts().head(10)
-                fig = px.bar(
-                    x=location_counts.values,
-                    y=location_counts.index,
-                    orientation='h',
-                    labels={'x': 'Count', 'y': 'Location'},
-                    title="Top 10 Locations with Infected Packages"
-                )
-                st.plotly_chart(fig, width='stretch')
+            infected_breakdown_fragment(infected_df)
 
             # Detailed table
             st.subheader("Infected Packages Details")
-            display_cols = ['package', 'version', 'location', 'match_package', 'match_version']
-            available_cols = [col for col in display_cols if col in infected_df.columns]
+            available_cols = [col for col in DISPLAY_COLS if col in infected_df.columns]
+            infected_limit = st.slider("Rows to display", 100, 10000, 500, key='infected_limit')
             st.dataframe(
-                infected_df[available_cols],
+                infected_df.loc[:, available_cols].head(infected_limit).reset_index(drop=True),
                 width='stretch',
-                height=400
+                height=400,
+                column_config={'location': st.column_config.TextColumn(width='medium')}
             )
+            st.caption(f"Showing {min(infected_limit, len(infected_df))} of {len(infected_df)} rows")
         else:
             st.success("✅ No infected packages found!")
 
     # Package version distribution
     st.header("📈 Package Version Distribution")
     if 'package' in df.columns and 'version' in df.columns:
-        # Select a package to analyze
-        selected_package = st.selectbox(
-            "Select a package to analyze versions",
-            options=sorted(df['package'].unique())
-        )
-
-        if selected_package:
-            package_df = df[df['package'] == selected_package]
-            version_counts = package_df['version'].value_counts()
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                fig = px.pie(
-                    values=version_counts.values,
-                    names=version_counts.index,
-                    title=f"Version Distribution for {selected_package}"
-                )
-                st.plotly_chart(fig, width='stretch')
-
-            with col2:
-                st.subheader("Locations")
-                st.dataframe(
-                    package_df[['version', 'location']],
-                    width='stretch',
-                    height=300
-                )
+        version_distribution_fragment(df)
 
     # Raw data viewer
     with st.expander("🔍 View Raw Data"):
-        st.dataframe(df, width='stretch', height=400)
+        # Only ship a bounded slice to the browser; the download still has every row
+        raw_limit = st.slider("Rows to display", 100, 10000, 500, key='raw_limit')
+        st.dataframe(raw_rows(df, raw_limit), width='stretch', height=400)
+        st.caption(f"Showing {min(raw_limit, len(df))} of {len(df)} rows")
 
         # Download button
-        csv = df.to_csv(index=False)
+        # Keyed on the loaded source, so reruns skip hashing the frame
+        csv = to_csv_bytes(*active_source())
         st.download_button(
             label="Download Filtered Data as CSV",
             data=csv,
@@ -1,9 +1,14 @@
 """
 Rust Packages (Crates) Analysis Page
 """
+from types import SimpleNamespace
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+
+import _agg as agg
+import _charts as charts
+from _data import load_csv, raw_rows, split_by_ecosystem
 
 st.set_page_config(
     page_title="Rust Packages",
@@ -11,203 +16,201 @@ st.set_page_config(
     layout="wide"
 )
 
-def load_data(csv_path: str) -> pd.DataFrame:
-    """Load and prepare the CSV data"""
-    try:
-        df = pd.read_csv(csv_path)
-        df.columns = df.columns.str.strip()
-
-        # Normalize column names
-        if 'package_name' in df.columns:
-            df['package'] = df['package_name']
-        if 'has_version' in df.columns:
-            df['version'] = df['has_version']
-        if 'should_path' in df.columns and 'location' not in df.columns:
-            df['location'] = df['should_path']
-        elif 'application_root' in df.columns and 'location' not in df.columns:
-            df['location'] = df['application_root']
-
-        if 'parent_package' in df.columns:
-            df['match_package'] = df['parent_package'].fillna('none')
-        elif 'match_package' not in df.columns:
-            df['match_package'] = 'none'
-
-        return df
-    except FileNotFoundError:
-        st.error(f"CSV file not found: {csv_path}")
-        st.stop()
-    except Exception as e:
-        st.error(f"Error loading CSV: {e}")
-        st.stop()
+# Rows shown in the raw data view unless "Show all rows" is ticked
+RAW_ROW_LIMIT = 2000
+
+# Single fill for the Rust bar charts; bar length already encodes the count
+CRATE_COLOR = '#E8731C'
+
+# Well-known crates grouped by what they are used for
+POPULAR_CRATES = {
+    'Serde': ('serde', 'serde_json'),
+    'Tokio': ('tokio',),
+    'Async Runtime': ('async-std', 'tokio', 'smol'),
+    'CLI': ('clap', 'structopt'),
+    'HTTP': ('reqwest', 'hyper', 'actix-web', 'axum'),
+    'Regex': ('regex',),
+    'Logging': ('log', 'env_logger', 'tracing'),
+    'Error Handling': ('anyhow', 'thiserror'),
+}
+ALL_POPULAR_CRATES = frozenset(crate for crates in POPULAR_CRATES.values() for crate in crates)
+
+@st.cache_data(ttl="10m", max_entries=8, hash_funcs={pd.DataFrame: agg.frame_key}, show_spinner=False)
+def build_view_model(rust_df: pd.DataFrame) -> SimpleNamespace:
+    """Every aggregate the page renders, computed and cached as one unit
+
+    Reruns hash `rust_df` once here instead of once per aggregation.
+    """
+    vm = SimpleNamespace(
+        total=len(rust_df),
+        unique_packages=rust_df['package'].nunique(),
+        unique_locations=rust_df['location'].nunique() if 'location' in rust_df.columns else 0,
+        infected=int(rust_df['_infected'].sum()),
+        top20=agg.top_packages(rust_df, n=20),
+        top5_versions=None,
+        top5_locations=None,
+        version_diversity=None,
+        detected=agg.detect_crates(rust_df, POPULAR_CRATES, ALL_POPULAR_CRATES),
+    )
+
+    if 'version' in rust_df.columns:
+        # One (package, version) count and one first-3-rows pass cover all five expanders
+        top5_df = rust_df[rust_df['package'].isin(vm.top20.index[:5])]
+        versions = top5_df.groupby(['package', 'version'], observed=True).size()
+        # Crates with no non-empty version have no groups here, so they are simply absent
+        vm.top5_versions = {
+            package: counts.droplevel('package').sort_values(ascending=False, kind='stable')
+            for package, counts in versions.groupby(level='package', observed=True)
+        }
+        if 'location' in rust_df.columns:
+            samples = top5_df.groupby('package', observed=True).head(3)
+            vm.top5_locations = samples.groupby('package', observed=True)['location'].agg(list)
+        vm.version_diversity = agg.version_diversity(rust_df)
+    return vm
+
+@st.fragment
+def top_crates_fragment(vm: SimpleNamespace):
+    """Top 20 crates chart with version/location details for the top 5"""
+    top20 = vm.top20
+    fig = charts.bar_chart(
+        top20,
+        "Top 20 Rust Crates by Frequency",
+        x_title='Occurrences',
+        y_title='Crate Name',
+        color=CRATE_COLOR,
+        height=700,
+    )
+    st.plotly_chart(fig, width='stretch', key='top20_rust')
+
+    # Show table with details
+    st.subheader("Crate Details")
+
+    # Group by package and show versions
+    for package, occurrences in top20.head(5).items():  # Show details for top 5
+        with st.expander(f"🦀 {package} ({occurrences} occurrences)"):
+            if vm.top5_versions is not None:
+                no_versions = pd.Series(index=pd.Index([], name='version'), dtype='int64')
+                version_counts = vm.top5_versions.get(package, no_versions)
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    st.write("**Versions:**")
+                    st.table(version_counts.rename('count').to_frame())
+
+                if vm.top5_locations is not None:
+                    with col2:
+                        st.write("**Sample Locations:**")
+                        st.table(pd.Series(vm.top5_locations.get(package, [])).to_frame('location'))
+
+@st.fragment
+def version_consistency_fragment(vm: SimpleNamespace):
+    """Crates found at more than one version"""
+    if vm.version_diversity is None:
+        return
+
+    # Find packages with multiple versions
+    version_diversity = vm.version_diversity
+    inconsistent = version_diversity[version_diversity > 1].head(10)
+
+    if len(inconsistent) > 0:
+        st.warning(f"Found {len(version_diversity[version_diversity > 1])} crates with multiple versions")
+
+        fig = charts.bar_chart(
+            inconsistent,
+            "Top 10 Crates with Most Version Variations",
+            x_title='Number of Different Versions',
+            y_title='Crate',
+            color=CRATE_COLOR,
+            height=400,
+        )
+        st.plotly_chart(fig, width='stretch', key='version_consistency_rust')
+    else:
+        st.success("✅ All crates have consistent versions!")
+
+@st.fragment
+def popular_crates_fragment(vm: SimpleNamespace):
+    """Detected popular crate categories and their share"""
+    detected = vm.detected
+    if not detected:
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Detected Categories:**")
+        for category, crates in detected.items():
+            st.write(f"**{category}**: {sum(crates.values())} total")
+            for crate, count in crates.items():
+                st.write(f"  - {crate} ({count})")
+
+    with col2:
+        # Pie chart of categories
+        counts = pd.Series({category: sum(crates.values()) for category, crates in detected.items()})
+        fig = charts.pie_chart(counts, "Distribution by Category")
+        st.plotly_chart(fig, width='stretch', key='popular_rust')
+
+@st.fragment
+def raw_data_fragment(rust_df: pd.DataFrame):
+    """Raw Rust rows; toggling "Show all rows" only reruns this fragment"""
+    # Only ship a bounded slice to the browser unless every row is asked for
+    show_all = st.checkbox("Show all rows", value=False, key='rust_show_all')
+    view = raw_rows(rust_df, None if show_all else RAW_ROW_LIMIT)
+    st.dataframe(view, width='stretch', height=400)
+    st.caption(f"Showing {len(view)} of {len(rust_df)} rows")
 
 def main():
     st.title("🦀 Rust Packages (Crates) Analysis")
 
     # Load data from uploaded file or path
     if 'uploaded_df' in st.session_state and st.session_state.uploaded_df is not None:
-        df = st.session_state.uploaded_df.copy()
+        df = st.session_state.uploaded_df
     else:
         csv_path = st.session_state.get('csv_path', '../output.csv')
-        df = load_data(csv_path)
-
-    # Normalize columns if needed
-    if 'package_name' in df.columns and 'package' not in df.columns:
-        df['package'] = df['package_name']
-    if 'has_version' in df.columns and 'version' not in df.columns:
-        df['version'] = df['has_version']
-    if 'should_path' in df.columns and 'location' not in df.columns:
-        df['location'] = df['should_path']
+        df = load_csv(csv_path)
 
     # Filter for Rust packages using ecosystem column if available
     if 'ecosystem' in df.columns:
-        rust_df = df[df['ecosystem'].str.lower() == 'rust'].copy()
+        rust_df = split_by_ecosystem(df).get('rust', pd.DataFrame())
     else:
         rust_df = pd.DataFrame()
 
-    # If filtering resulted in empty dataframe, show message
+    # Nothing below applies to a dataset without Rust crates
     if len(rust_df) == 0:
         st.info("No Rust packages found in the dataset.")
-        rust_df = pd.DataFrame()
+        return
+
+    vm = build_view_model(rust_df)
 
     # Overview metrics
     st.header("📊 Rust Overview")
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("Total Rust Crates", len(rust_df))
+        st.metric("Total Rust Crates", vm.total)
 
     with col2:
-        unique_packages = rust_df['package'].nunique() if 'package' in rust_df.columns else 0
-        st.metric("Unique Crates", unique_packages)
+        st.metric("Unique Crates", vm.unique_packages)
 
     with col3:
-        unique_locations = rust_df['location'].nunique() if 'location' in rust_df.columns else 0
-        st.metric("Locations", unique_locations)
+        st.metric("Locations", vm.unique_locations)
 
     with col4:
-        if 'match_package' in rust_df.columns:
-            infected = rust_df[rust_df['match_package'].str.lower() != 'none'].shape[0]
-        else:
-            infected = 0
-        st.metric("⚠️ Infected", infected, delta_color="inverse")
+        st.metric("⚠️ Infected", vm.infected, delta_color="inverse")
 
     # Top 20 most used Rust crates
     st.header("🔝 Top 20 Most Used Rust Crates")
-
-    if 'package' in rust_df.columns and len(rust_df) > 0:
-        package_counts = rust_df['package'].value_counts().head(20)
-
-        fig = px.bar(
-            x=package_counts.values,
-            y=package_counts.index,
-            orientation='h',
-            labels={'x': 'Occurrences', 'y': 'Crate Name'},
-            title="Top 20 Rust Crates by Frequency",
-            color=package_counts.values,
-            color_continuous_scale='Oranges'
-        )
-        fig.update_layout(height=700, showlegend=False)
-        st.plotly_chart(fig, width='stretch')
-
-        # Show table with details
-        st.subheader("Crate Details")
-        top_packages = package_counts.head(20).index.tolist()
-
-        # Group by package and show versions
-        for package in top_packages[:5]:  # Show details for top 5
-            with st.expander(f"🦀 {package} ({package_counts[package]} occurrences)"):
-                pkg_df = rust_df[rust_df['package'] == package]
-                if 'version' in pkg_df.columns:
-                    version_counts = pkg_df['version'].value_counts()
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        st.write("**Versions:**")
-                        for version, count in version_counts.items():
-                            st.write(f"- `{version}`: {count} locations")
-
-                    with col2:
-                        st.write("**Sample Locations:**")
-                        for loc in pkg_df['location'].head(3):
-                            st.write(f"- {loc}")
-    else:
-        st.info("No Rust crates found in the dataset")
+    top_crates_fragment(vm)
 
     # Version consistency analysis
     st.header("📊 Version Consistency")
-
-    if 'package' in rust_df.columns and 'version' in rust_df.columns and len(rust_df) > 0:
-        # Find packages with multiple versions
-        version_diversity = rust_df.groupby('package')['version'].nunique().sort_values(ascending=False)
-        inconsistent = version_diversity[version_diversity > 1].head(10)
-
-        if len(inconsistent) > 0:
-            st.warning(f"Found {len(version_diversity[version_diversity > 1])} crates with multiple versions")
-
-            fig = px.bar(
-                x=inconsistent.values,
-                y=inconsistent.index,
-                orientation='h',
-                labels={'x': 'Number of Different Versions', 'y': 'Crate'},
-                title="Top 10 Crates with Most Version Variations",
-                color=inconsistent.values,
-                color_continuous_scale='Reds'
-            )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, width='stretch')
-        else:
-            st.success("✅ All crates have consistent versions!")
+    version_consistency_fragment(vm)
 
     # Common Rust crates detection
     st.header("🔧 Popular Crate Detection")
-
-    if 'package' in rust_df.columns and len(rust_df) > 0:
-        popular_crates = {
-            'Serde': ['serde', 'serde_json'],
-            'Tokio': ['tokio'],
-            'Async Runtime': ['async-std', 'tokio', 'smol'],
-            'CLI': ['clap', 'structopt'],
-            'HTTP': ['reqwest', 'hyper', 'actix-web', 'axum'],
-            'Regex': ['regex'],
-            'Logging': ['log', 'env_logger', 'tracing'],
-            'Error Handling': ['anyhow', 'thiserror']
-        }
-
-        detected = {}
-        for category, crates in popular_crates.items():
-            count = 0
-            found_crates = []
-            for crate in crates:
-                matches = rust_df[rust_df['package'].str.lower() == crate]
-                if len(matches) > 0:
-                    count += len(matches)
-                    found_crates.append(f"{crate} ({len(matches)})")
-            if count > 0:
-                detected[category] = (count, found_crates)
-
-        if detected:
-            col1, col2 = st.columns(2)
-            with col1:
-                st.write("**Detected Categories:**")
-                for category, (count, crates) in detected.items():
-                    st.write(f"**{category}**: {count} total")
-                    for crate in crates:
-                        st.write(f"  - {crate}")
-
-            with col2:
-                # Pie chart of categories
-                categories = list(detected.keys())
-                counts = [detected[cat][0] for cat in categories]
-                fig = px.pie(
-                    values=counts,
-                    names=categories,
-                    title="Distribution by Category"
-                )
-                st.plotly_chart(fig, width='stretch')
+    popular_crates_fragment(vm)
 
     # Raw data
     with st.expander("🔍 View Rust Crate Data"):
-        st.dataframe(rust_df, width='stretch', height=400)
+        raw_data_fragment(rust_df)
 
 if __name__ == "__main__":
     main()